@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
+import random
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from datetime import date as date_type
 from typing import Any
 
 import httpx
+import ijson
+import orjson
 
 
 class CDashError(Exception):
@@ -26,13 +33,91 @@ class CDashConnectionError(CDashError):
     """Connection to CDash server failed."""
 
 
-@dataclass
+# CDash filter system: field=status, compare=62 ("is not"), value=Passed.
+# filtercombine is always sent so further filters AND together and CDash
+# does not reject the combination.
+_NOT_PASSED_FILTER = {
+    "filtercount": "1",
+    "showfilters": "1",
+    "filtercombine": "and",
+    "field1": "status",
+    "compare1": "62",
+    "value1": "Passed",
+}
+
+# field=status, compare=61 ("is"); callers supply value1
+_STATUS_IS_FILTER_BASE = {
+    "filtercount": "1",
+    "showfilters": "1",
+    "filtercombine": "and",
+    "field1": "status",
+    "compare1": "61",
+}
+
+# Client-error statuses with a dedicated exception type and message
+_AUTH_ERROR = (
+    CDashAuthError,
+    "Authentication failed ({status}). Check your CDASH_TOKEN environment variable.",
+)
+_STATUS_ERRORS: dict[int, tuple[type[CDashError], str]] = {
+    400: (
+        CDashError,
+        "Bad request for {path}. Check that all required parameters are provided.",
+    ),
+    401: _AUTH_ERROR,
+    403: _AUTH_ERROR,
+    404: (CDashNotFoundError, "Resource not found: {path}"),
+}
+
+# Response cache lifetimes (seconds) for endpoints that differ from cache_ttl:
+# project-wide views change as builds are submitted, coverage rarely does, and
+# a submitted test result (one buildtestid) never changes.
+_TTL_LIVE = 30.0
+_TTL_COVERAGE = 120.0
+_TTL_TEST_DETAILS = 3600.0
+
+# Gateway errors worth retrying; other 5xx are usually deterministic failures.
+_RETRY_STATUS = frozenset({502, 503, 504})
+
+# httpx clients shared by CDashClient contexts that are open at the same time,
+# keyed by event loop and connection settings, with a reference count.
+_CLIENT_POOL: dict[tuple[Any, ...], tuple[httpx.AsyncClient, int]] = {}
+
+# CDash endpoint paths
+_P_INDEX = "/api/v1/index.php"
+_P_QUERY_TESTS = "/api/v1/queryTests.php"
+_P_BUILD_SUMMARY = "/api/v1/buildSummary.php"
+_P_BUILD_ERRORS = "/api/v1/viewBuildError.php"
+_P_BUILD_TESTS = "/api/v1/viewTest.php"
+_P_CONFIGURE = "/api/v1/viewConfigure.php"
+_P_TEST_DETAILS = "/api/v1/testDetails.php"
+_P_TEST_SUMMARY = "/api/v1/testSummary.php"
+_P_BUILD_UPDATE = "/api/v1/viewUpdate.php"
+_P_OVERVIEW = "/api/v1/overview.php"
+_P_VIEW_COVERAGE = "/ajax/getviewcoverage.php"
+_P_COMPARE_COVERAGE = "/api/v1/compareCoverage.php"
+_P_DYNAMIC_ANALYSIS = "/api/v1/viewDynamicAnalysis.php"
+
+
+@dataclass(slots=True)
 class CDashClient:
     """Async client for the CDash REST API.
 
+    Returned JSON objects may be cached and shared between callers; treat
+    them as read-only.
+
     Args:
         base_url: CDash instance URL. Defaults to CDASH_URL env var or my.cdash.org.
         token: API token for auth. Defaults to CDASH_TOKEN env var.
+        cache_ttl: Seconds a successful GET response is served from memory, for
+            endpoints without their own lifetime (build-specific views). Kept
+            short because today's builds are still submitting; an expired
+            entry is revalidated with a conditional GET, so an unchanged
+            finished build costs a bodiless 304.
+        cache_max_size: Maximum number of cached responses (LRU eviction).
+        max_connections: Upper bound on concurrent connections to CDash.
+        max_keepalive_connections: Idle connections kept open for reuse.
+        max_retries: Extra attempts on connection failures and 502/503/504.
     """
 
     base_url: str = field(
@@ -43,31 +128,234 @@ class CDashClient:
     token: str | None = field(
         default_factory=lambda: os.environ.get("CDASH_TOKEN")
     )
+    cache_ttl: float = 60.0
+    cache_max_size: int = 2048
+    max_connections: int = 200
+    max_keepalive_connections: int = 100
+    max_retries: int = 2
     _client: httpx.AsyncClient | None = field(default=None, init=False, repr=False)
+    _pool_key: tuple[Any, ...] = field(default=(), init=False, repr=False)
+    _cache: OrderedDict[tuple[str, str], tuple[float, Any, str | None, str | None]] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    _inflight: dict[tuple[str, str], asyncio.Future[Any]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _project_id_cache: dict[str, int] = field(default_factory=dict, init=False, repr=False)
 
     async def __aenter__(self) -> CDashClient:
-        headers = {}
-        if self.token:
-            headers["Authorization"] = f"Bearer {self.token}"
-        self._client = httpx.AsyncClient(
-            base_url=self.base_url,
-            headers=headers,
-            timeout=30.0,
-            follow_redirects=True,
+        key = (
+            asyncio.get_running_loop(),
+            self.base_url,
+            self.token,
+            self.max_connections,
+            self.max_keepalive_connections,
         )
+        entry = _CLIENT_POOL.get(key)
+        if entry is None:
+            headers = {}
+            if self.token:
+                headers["Authorization"] = f"Bearer {self.token}"
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=30.0,
+                follow_redirects=True,
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            refs = 0
+        else:
+            client, refs = entry
+        _CLIENT_POOL[key] = (client, refs + 1)
+        self._pool_key = key
+        self._client = client
         return self
 
     async def __aexit__(self, *exc: object) -> None:
         if self._client:
-            await self._client.aclose()
             self._client = None
+            client, refs = _CLIENT_POOL[self._pool_key]
+            if refs > 1:
+                _CLIENT_POOL[self._pool_key] = (client, refs - 1)
+            else:
+                del _CLIENT_POOL[self._pool_key]
+                await client.aclose()
+
+    def bust_cache(self) -> None:
+        """Drop all cached responses."""
+        self._cache.clear()
+
+    @staticmethod
+    def _check_status(resp: httpx.Response, path: str) -> None:
+        """Map an HTTP error status to the matching CDashError subclass."""
+        status = resp.status_code
+        if 200 <= status < 300:
+            return
+        error = _STATUS_ERRORS.get(status)
+        if error is not None:
+            exc_cls, message = error
+            raise exc_cls(message.format(status=status, path=path))
+        if status >= 500:
+            raise CDashError(
+                f"CDash server error ({status}) for {path}. "
+                "The server may be misconfigured or the requested data unavailable."
+            )
+        resp.raise_for_status()
 
-    async def _get(self, path: str, params: dict[str, Any] | None = None) -> Any:
-        """Make a GET request to the CDash API and return parsed JSON."""
-        assert self._client is not None, "Client not initialized. Use 'async with'."
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        query: httpx.QueryParams,
+        headers: dict[str, str],
+    ) -> httpx.Response:
+        """Issue a GET, retrying transient failures with jittered exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                resp = await client.get(path, params=query, headers=headers)
+            except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+                if last_attempt:
+                    raise CDashConnectionError(
+                        f"Cannot connect to {self.base_url}: {e}"
+                    ) from e
+            except httpx.TimeoutException as e:
+                raise CDashConnectionError(
+                    f"Request to {self.base_url} timed out: {e}"
+                ) from e
+            else:
+                if last_attempt or resp.status_code not in _RETRY_STATUS:
+                    return resp
+            delay = min(0.2 * 2**attempt, 2.0)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        raise AssertionError("unreachable")
+
+    async def _get(
+        self,
+        path: str,
+        params: httpx.QueryParams | dict[str, Any] | None = None,
+        ttl: float | None = None,
+    ) -> Any:
+        """Make a GET request to the CDash API and return parsed JSON.
+
+        Successful responses are cached in memory for ``ttl`` seconds
+        (``cache_ttl`` when not given).
+        Once an entry expires it is revalidated with ``If-None-Match`` /
+        ``If-Modified-Since`` so an unchanged resource costs a bodiless 304.
+        Concurrent calls for the same request share a single fetch.
+
+        The returned object is the cached one, shared by every caller of the
+        same request, so it must not be mutated.
+        """
+        client = self._client
+        if client is None:
+            raise CDashError("Client not initialized. Use 'async with'.")
+        # Encode once: the query string doubles as the cache key.
+        query = params if isinstance(params, httpx.QueryParams) else httpx.QueryParams(params)
+        key = (path, str(query))
+        cached = self._cache.get(key)
+        if ttl is None:
+            ttl = self.cache_ttl
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            self._cache.move_to_end(key)
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(client, path, query, key))
+            self._inflight[key] = task
+
+            def _done(t: asyncio.Future[Any]) -> None:
+                if self._inflight.get(key) is t:
+                    del self._inflight[key]
+                # Mark a failure as retrieved: every waiter may have been
+                # cancelled, leaving no one to await the shared fetch.
+                if not t.cancelled():
+                    t.exception()
+
+            task.add_done_callback(_done)
+        # Shield so one cancelled caller does not cancel the fetch for the others.
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        query: httpx.QueryParams,
+        key: tuple[str, str],
+    ) -> Any:
+        """Fetch, revalidate and cache one response for _get."""
+        cached = self._cache.get(key)
+        headers: dict[str, str] = {}
+        if cached is not None:
+            _, data, etag, last_modified = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        resp = await self._send(client, path, query, headers)
+        if resp.status_code == 304 and cached is not None:
+            self._cache[key] = (time.monotonic(), data, etag, last_modified)
+            self._cache.move_to_end(key)
+            return data
+        self._check_status(resp, path)
+        if not resp.content:
+            data = {}
+        else:
+            try:
+                data = orjson.loads(resp.content)
+            except orjson.JSONDecodeError as e:
+                raise CDashError(f"Invalid JSON response for {path}: {e}") from e
+        if resp.status_code == 200:
+            self._cache[key] = (
+                time.monotonic(),
+                data,
+                resp.headers.get("etag"),
+                resp.headers.get("last-modified"),
+            )
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_max_size:
+                self._cache.popitem(last=False)
+        return data
+
+    async def _get_stream(
+        self,
+        path: str,
+        params: httpx.QueryParams | dict[str, Any] | None,
+        prefix: str,
+    ) -> AsyncIterator[Any]:
+        """Stream a GET response and yield each JSON item found under ``prefix``.
+
+        Items are decoded incrementally as bytes arrive, so the full document
+        is never materialized. Streamed responses bypass the response cache.
+        """
+        client = self._client
+        if client is None:
+            raise CDashError("Client not initialized. Use 'async with'.")
+        items = ijson.sendable_list()
+        parser = ijson.items_coro(items, prefix, use_float=True)
         try:
-            resp = await self._client.get(path, params=params)
-        except httpx.ConnectError as e:
+            async with client.stream("GET", path, params=params) as resp:
+                if resp.is_error:
+                    await resp.aread()
+                    self._check_status(resp, path)
+                async for chunk in resp.aiter_bytes():
+                    parser.send(chunk)
+                    for item in items:
+                        yield item
+                    del items[:]
+            # Closing the parser validates the end of the document and
+            # flushes any item completed by the last chunk.
+            parser.close()
+            for item in items:
+                yield item
+        except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
             raise CDashConnectionError(
                 f"Cannot connect to {self.base_url}: {e}"
             ) from e
@@ -75,26 +363,8 @@ class CDashClient:
             raise CDashConnectionError(
                 f"Request to {self.base_url} timed out: {e}"
             ) from e
-
-        if resp.status_code in (401, 403):
-            raise CDashAuthError(
-                f"Authentication failed ({resp.status_code}). "
-                "Check your CDASH_TOKEN environment variable."
-            )
-        if resp.status_code == 400:
-            raise CDashError(
-                f"Bad request for {path}. "
-                "Check that all required parameters are provided."
-            )
-        if resp.status_code == 404:
-            raise CDashNotFoundError(f"Resource not found: {path}")
-        if resp.status_code >= 500:
-            raise CDashError(
-                f"CDash server error ({resp.status_code}) for {path}. "
-                "The server may be misconfigured or the requested data unavailable."
-            )
-        resp.raise_for_status()
-        return resp.json()
+        except ijson.JSONError as e:
+            raise CDashError(f"Invalid JSON response for {path}: {e}") from e
 
     async def get_dashboard(
         self, project: str, date: str | None = None
@@ -108,7 +378,7 @@ class CDashClient:
         params: dict[str, Any] = {"project": project}
         if date:
             params["date"] = date
-        return await self._get("/api/v1/index.php", params)
+        return await self._get(_P_INDEX, params, _TTL_LIVE)
 
     async def query_tests(
         self,
@@ -116,6 +386,7 @@ class CDashClient:
         date: str | None = None,
         test_name: str | None = None,
         status_filter: str = "not_passed",
+        limit: int | None = None,
     ) -> dict[str, Any]:
         """Query tests across all builds.
 
@@ -124,22 +395,49 @@ class CDashClient:
             date: Optional date string (YYYY-MM-DD).
             test_name: Optional test name filter.
             status_filter: "not_passed" to get failing/notrun tests.
+            limit: Optional cap on returned test results, applied by CDash.
         """
+        params = self._query_tests_params(project, date, test_name, status_filter, limit)
+        return await self._get(_P_QUERY_TESTS, params, _TTL_LIVE)
+
+    async def query_tests_iter(
+        self,
+        project: str,
+        date: str | None = None,
+        test_name: str | None = None,
+        status_filter: str = "not_passed",
+        limit: int | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Like query_tests, but stream-parse and yield one test result at a time.
+
+        Useful for large projects when only counts or a few fields are needed.
+
+        Args:
+            project: CDash project name.
+            date: Optional date string (YYYY-MM-DD).
+            test_name: Optional test name filter.
+            status_filter: "not_passed" to get failing/notrun tests.
+            limit: Optional cap on returned test results, applied by CDash.
+        """
+        params = self._query_tests_params(project, date, test_name, status_filter, limit)
+        async for test in self._get_stream(_P_QUERY_TESTS, params, "builds.item"):
+            yield test
+
+    @staticmethod
+    def _query_tests_params(
+        project: str,
+        date: str | None,
+        test_name: str | None,
+        status_filter: str,
+        limit: int | None = None,
+    ) -> dict[str, Any]:
+        """Build the queryTests.php parameters, including CDash filters."""
         params: dict[str, Any] = {"project": project}
         if date:
             params["date"] = date
 
-        # CDash filter system: filtercombine=and, field=status, compare=62 ("is not"), value=Passed
         if status_filter == "not_passed":
-            params.update(
-                {
-                    "filtercount": "1",
-                    "showfilters": "1",
-                    "field1": "status",
-                    "compare1": "62",
-                    "value1": "Passed",
-                }
-            )
+            params |= _NOT_PASSED_FILTER
 
         if test_name:
             # Add test name filter
@@ -151,7 +449,10 @@ class CDashClient:
             params[f"compare{filter_idx}"] = "63"  # "contains"
             params[f"value{filter_idx}"] = test_name
 
-        return await self._get("/api/v1/queryTests.php", params)
+        if limit is not None:
+            params["limit"] = limit
+
+        return params
 
     async def get_build_summary(self, build_id: int) -> dict[str, Any]:
         """Get detailed summary for a specific build.
@@ -159,7 +460,7 @@ class CDashClient:
         Args:
             build_id: The CDash build ID.
         """
-        return await self._get("/api/v1/buildSummary.php", {"buildid": build_id})
+        return await self._get(_P_BUILD_SUMMARY, {"buildid": build_id})
 
     async def get_build_errors(
         self, build_id: int, warnings: bool = False
@@ -174,31 +475,30 @@ class CDashClient:
             "buildid": build_id,
             "type": 1 if warnings else 0,
         }
-        return await self._get("/api/v1/viewBuildError.php", params)
+        return await self._get(_P_BUILD_ERRORS, params)
 
     async def get_build_tests(
-        self, build_id: int, status_filter: str | None = None
+        self,
+        build_id: int,
+        status_filter: str | None = None,
+        limit: int | None = None,
     ) -> dict[str, Any]:
         """Get all tests for a specific build.
 
         Args:
             build_id: The CDash build ID.
             status_filter: Optional filter: "passed", "failed", "notrun".
+            limit: Optional cap on returned tests, applied by CDash.
         """
         params: dict[str, Any] = {"buildid": build_id}
         if status_filter:
             # CDash uses onlypassed/onlyfailed/onlynotrun in some views
             # but viewTest uses filtercount approach
-            params.update(
-                {
-                    "filtercount": "1",
-                    "showfilters": "1",
-                    "field1": "status",
-                    "compare1": "61",  # "is"
-                    "value1": status_filter.capitalize(),
-                }
-            )
-        return await self._get("/api/v1/viewTest.php", params)
+            params |= _STATUS_IS_FILTER_BASE
+            params["value1"] = status_filter.capitalize()
+        if limit is not None:
+            params["limit"] = limit
+        return await self._get(_P_BUILD_TESTS, params)
 
     async def get_configure(self, build_id: int) -> dict[str, Any]:
         """Get CMake configure output for a build.
@@ -206,18 +506,24 @@ class CDashClient:
         Args:
             build_id: The CDash build ID.
         """
-        return await self._get("/api/v1/viewConfigure.php", {"buildid": build_id})
+        return await self._get(_P_CONFIGURE, {"buildid": build_id})
 
     async def _resolve_project_id(self, project_name: str) -> int:
         """Resolve a project name to its numeric CDash ID.
 
+        The mapping never changes for a given server, so it is memoized for
+        the lifetime of the client.
+
         Args:
             project_name: Human-readable project name.
         """
-        data = await self._get("/api/v1/index.php", {"project": project_name})
+        if project_name in self._project_id_cache:
+            return self._project_id_cache[project_name]
+        data = await self._get(_P_INDEX, {"project": project_name}, _TTL_LIVE)
         project_id = data.get("projectid")
         if not project_id:
             raise CDashNotFoundError(f"Project not found: {project_name}")
+        self._project_id_cache[project_name] = int(project_id)
         return int(project_id)
 
     async def get_test_details(self, build_test_id: int) -> dict[str, Any]:
@@ -227,26 +533,29 @@ class CDashClient:
             build_test_id: The CDash build-test ID (unique per test-in-build).
         """
         return await self._get(
-            "/api/v1/testDetails.php", {"buildtestid": build_test_id}
+            _P_TEST_DETAILS, {"buildtestid": build_test_id}, _TTL_TEST_DETAILS
         )
 
     async def get_test_summary(
-        self, project: str, test_name: str, date: str | None = None
+        self, project: str | int, test_name: str, date: str | None = None
     ) -> dict[str, Any]:
         """Get summary of a test across builds (pass/fail history).
 
         Args:
-            project: CDash project name.
+            project: CDash project name, or its numeric ID to skip the lookup.
             test_name: Exact test name.
             date: Optional date string (YYYY-MM-DD).
         """
-        project_id = await self._resolve_project_id(project)
+        if isinstance(project, int):
+            project_id = project
+        else:
+            project_id = await self._resolve_project_id(project)
         params: dict[str, Any] = {
             "project": project_id,
             "name": test_name,
             "date": date or date_type.today().isoformat(),
         }
-        return await self._get("/api/v1/testSummary.php", params)
+        return await self._get(_P_TEST_SUMMARY, params, _TTL_LIVE)
 
     async def get_build_update(self, build_id: int) -> dict[str, Any]:
         """Get source code changes (VCS updates) associated with a build.
@@ -254,7 +563,31 @@ class CDashClient:
         Args:
             build_id: The CDash build ID.
         """
-        return await self._get("/api/v1/viewUpdate.php", {"buildid": build_id})
+        return await self._get(_P_BUILD_UPDATE, {"buildid": build_id})
+
+    async def get_build_bundle(self, build_id: int) -> dict[str, Any]:
+        """Fetch summary, errors, warnings, tests, configure and update for a build.
+
+        The six requests are issued concurrently. A failing endpoint does not
+        cancel the others: its entry holds the raised ``CDashError`` instead.
+
+        Args:
+            build_id: The CDash build ID.
+        """
+        results = await asyncio.gather(
+            self.get_build_summary(build_id),
+            self.get_build_errors(build_id, warnings=False),
+            self.get_build_errors(build_id, warnings=True),
+            self.get_build_tests(build_id),
+            self.get_configure(build_id),
+            self.get_build_update(build_id),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, CDashError):
+                raise result
+        keys = ("summary", "errors", "warnings", "tests", "configure", "update")
+        return dict(zip(keys, results))
 
     async def get_project_overview(
         self, project: str, date: str | None = None
@@ -268,7 +601,7 @@ class CDashClient:
         params: dict[str, Any] = {"project": project}
         if date:
             params["date"] = date
-        return await self._get("/api/v1/overview.php", params)
+        return await self._get(_P_OVERVIEW, params, _TTL_LIVE)
 
     async def get_coverage_comparison(
         self,
@@ -288,13 +621,11 @@ class CDashClient:
             build_id: Optional build ID to get coverage for a specific build.
         """
         if build_id is not None:
-            return await self._get(
-                "/ajax/getviewcoverage.php", {"buildid": build_id}
-            )
+            return await self._get(_P_VIEW_COVERAGE, {"buildid": build_id}, _TTL_COVERAGE)
         params: dict[str, Any] = {"project": project}
         if date:
             params["date"] = date
-        return await self._get("/api/v1/compareCoverage.php", params)
+        return await self._get(_P_COMPARE_COVERAGE, params, _TTL_COVERAGE)
 
     async def get_dynamic_analysis(self, build_id: int) -> dict[str, Any]:
         """Get dynamic analysis results (e.g. Valgrind) for a build.
@@ -302,6 +633,4 @@ class CDashClient:
         Args:
             build_id: The CDash build ID.
         """
-        return await self._get(
-            "/api/v1/viewDynamicAnalysis.php", {"buildid": build_id}
-        )
+        return await self._get(_P_DYNAMIC_ANALYSIS, {"buildid": build_id})
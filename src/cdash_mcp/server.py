@@ -1,10 +1,18 @@
 """FastMCP server exposing CDash CI/CD data as tools. [AI-Claude]"""
 
+import asyncio
+import heapq
+import io
+import itertools
 import logging
+import os
 import re
 import sys
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Callable
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from operator import itemgetter
+from typing import Any, NamedTuple
 
 from mcp.server.fastmcp import Context, FastMCP
 
@@ -15,21 +23,184 @@ logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger("cdash-mcp")
 
 
+def _dbg(msg: str, *args: object) -> None:
+    """Log at DEBUG level; cheap no-op when DEBUG is disabled (the default).
+
+    Use %-style arguments, never f-strings, so formatting is skipped too.
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args)
+
+
+# CDashClient of the running server, set by lifespan and inherited by tool calls
+_CLIENT_CV: ContextVar[CDashClient] = ContextVar("cdash_client")
+
+# Shared read-only default for nested .get() lookups
+_EMPTY: dict = {}
+
+# One-character markers for CTest result statuses
+_STATUS_ICON = {"Passed": "+", "Failed": "!", "Not Run": "-"}
+
+# Dashboard build counters reported by _build_status, in display order
+_STATUS_FIELDS = (
+    ("configure_err", "configure", "error"),
+    ("compile_err", "compilation", "error"),
+    ("warnings", "compilation", "warning"),
+    ("test_fail", "test", "fail"),
+    ("test_notrun", "test", "notrun"),
+    ("test_pass", "test", "pass"),
+)
+
+# Compiler errors shown per build by triage_failures
+_TRIAGE_ERRORS_PER_BUILD = 5
+
+# CDash embeds HTML markup in some JSON fields (e.g. coverage table cells)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _pool_size() -> int:
+    """Read CDASH_MCP_POOL_SIZE, falling back to 50 on a missing or invalid value."""
+    raw = os.environ.get("CDASH_MCP_POOL_SIZE")
+    if raw is None:
+        return 50
+    try:
+        size = int(raw)
+    except ValueError:
+        size = 0
+    if size < 1:
+        logger.warning(
+            "Ignoring invalid CDASH_MCP_POOL_SIZE=%r (expected a positive integer); using 50",
+            raw,
+        )
+        return 50
+    return size
+
+
 @asynccontextmanager
 async def lifespan(server: FastMCP) -> AsyncIterator[dict]:
     """Share a single CDashClient across all tool invocations."""
-    client = CDashClient()
-    logger.info("CDash MCP server starting (base_url=%s)", client.base_url)
+    pool_size = _pool_size()
+    client = CDashClient(
+        max_connections=pool_size,
+        max_keepalive_connections=max(1, pool_size * 2 // 5),
+    )
+    logger.info(
+        "CDash MCP server starting (base_url=%s, pool_size=%d)",
+        client.base_url,
+        pool_size,
+    )
     async with client:
-        yield {"client": client}
+        token = _CLIENT_CV.set(client)
+        try:
+            yield {"client": client}
+        finally:
+            _CLIENT_CV.reset(token)
 
 
 mcp = FastMCP("cdash-mcp", lifespan=lifespan)
 
 
 def _get_client(ctx: Context) -> CDashClient:
-    """Extract the CDashClient from the request context."""
-    return ctx.request_context.lifespan_context["client"]
+    """Return the lifespan's CDashClient.
+
+    Tool calls normally inherit it through ``_CLIENT_CV``; the request
+    context is the fallback for transports that run lifespan elsewhere.
+    """
+    client = _CLIENT_CV.get(None)
+    if client is None:
+        client = ctx.request_context.lifespan_context["client"]
+    return client
+
+
+def _g2(d: dict, k1: str, k2: str, default: Any = 0) -> Any:
+    """Return ``d[k1][k2]``, or ``default`` when either level is missing."""
+    return d.get(k1, _EMPTY).get(k2, default)
+
+
+class _BuildCounts(NamedTuple):
+    """Dashboard counters of one build, in ``_STATUS_FIELDS`` order."""
+
+    configure_err: int
+    compile_err: int
+    warnings: int
+    test_fail: int
+    test_notrun: int
+    test_pass: int
+
+    @property
+    def issues(self) -> int:
+        """Configure/compile errors plus failing and not-run tests."""
+        return self.configure_err + self.compile_err + self.test_fail + self.test_notrun
+
+
+def _build_counts(build: dict) -> _BuildCounts:
+    """Extract a dashboard build's counters in one pass over ``_STATUS_FIELDS``."""
+    return _BuildCounts(*(_g2(build, section, key) for _, section, key in _STATUS_FIELDS))
+
+
+def _clamp(limit: int, offset: int) -> tuple[int, int]:
+    """Clamp pagination arguments to ``1 <= limit <= 200`` and ``offset >= 0``."""
+    return max(1, min(limit, 200)), max(0, offset)
+
+
+def _page(seq: list, limit: int, offset: int) -> list:
+    """Return one page of ``seq`` without copying the unshown tail."""
+    return list(itertools.islice(seq, offset, offset + limit))
+
+
+def _truncate_bytes(text: str, limit: int, suffix: str) -> str:
+    """Cut ``text`` to at most ``limit`` UTF-8 bytes, appending ``suffix`` if cut.
+
+    Transports bound message size in bytes, so multi-byte build output is
+    measured the same way; a code point split by the cut is dropped.
+    """
+    if len(text) <= limit // 4:
+        return text
+    data = text.encode()
+    if len(data) <= limit:
+        return text
+    return f"{data[:limit].decode(errors='ignore')}{suffix}"
+
+
+def _defect_count(analysis: dict) -> int:
+    """Total defects of a dynamic-analysis entry (0 if the counts are malformed)."""
+    try:
+        return sum(map(int, analysis.get("defects", [])))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _build_status(counts: _BuildCounts) -> str:
+    """Summarize a build's counters, e.g. ``"compile_err=2, test_pass=5"``."""
+    status_parts = [
+        f"{label}={value}"
+        for (label, _, _), value in zip(_STATUS_FIELDS, counts)
+        if value
+    ]
+    return ", ".join(status_parts) if status_parts else "OK"
+
+
+def _strip_tags(value: object) -> str:
+    """Strip HTML markup from a CDash table cell.
+
+    Cells are usually a single ``<tag ...>text</tag>`` element, which two
+    ``str.partition`` calls handle; anything else falls back to the regex.
+    """
+    s = str(value)
+    if "<" not in s:
+        return s.strip()
+    if s[0] == "<" and s[-1] == ">" and s.count("<") == 2:
+        tag, _, rest = s[1:].partition(">")
+        text, _, close = rest.partition("<")
+        if tag and len(close) > 1 and ">" not in close[:-1]:
+            return text.strip()
+    return _HTML_TAG_RE.sub("", s).strip()
+
+
+def _buf() -> tuple[io.StringIO, Callable[[str], int]]:
+    """Return a text buffer and its bound ``write`` for building tool output."""
+    buf = io.StringIO()
+    return buf, buf.write
 
 
 # ---------------------------------------------------------------------------
@@ -55,67 +226,59 @@ async def get_dashboard(
     except CDashError as e:
         return f"Error: {e}"
 
-    lines: list[str] = []
+    buf, w = _buf()
     title = data.get("title", project)
     dashboard_date = data.get("datetime", date or "today")
-    lines.append(f"# {title} - Dashboard ({dashboard_date})")
-    lines.append("")
+    w(f"# {title} - Dashboard ({dashboard_date})\n")
+    w("\n")
 
     build_groups = data.get("buildgroups", [])
     if not build_groups:
-        lines.append("No build groups found.")
-        return "\n".join(lines)
+        w("No build groups found.\n")
+        return buf.getvalue()
 
     for group in build_groups:
-        group_name = group.get("name", "Unknown")
         builds = group.get("builds", [])
-        lines.append(f"## {group_name} ({len(builds)} builds)")
-        lines.append("")
-
-        # Show up to 20 builds with issues first, then summarize rest
-        shown = 0
-        for build in builds:
-            name = build.get("buildname", "?")
-            site = build.get("site", "?")
-            configure_errors = build.get("configure", {}).get("error", 0)
-            compile_errors = build.get("compilation", {}).get("error", 0)
-            compile_warnings = build.get("compilation", {}).get("warning", 0)
-            test_fail = build.get("test", {}).get("fail", 0)
-            test_notrun = build.get("test", {}).get("notrun", 0)
-            test_pass = build.get("test", {}).get("pass", 0)
-            build_id = build.get("id", "?")
-
-            has_issues = (
-                configure_errors or compile_errors or test_fail or test_notrun
-            )
+        if not builds:
+            continue
+        group_name = group.get("name", "Unknown")
+        parsed = [(build, _build_counts(build)) for build in builds]
+        with_issues = [item for item in parsed if item[1].issues]
+
+        if not with_issues and not any(counts.warnings for _, counts in parsed):
+            # Healthy group (no errors, failures or warnings): one summary line,
+            # build IDs only, no status formatting
+            w(f"## {group_name} ({len(builds)} builds) — all passing\n")
+            w("\n")
+            for build in itertools.islice(builds, 20):
+                g = build.get
+                w(f"- [id={g('id', '?')}] {g('buildname', '?')} @ {g('site', '?')}\n")
+            if len(builds) > 20:
+                w(f"  ... and {len(builds) - 20} more builds\n")
+            w("\n")
+            continue
 
-            if has_issues or shown < 20:
-                status_parts = []
-                if configure_errors:
-                    status_parts.append(f"configure_err={configure_errors}")
-                if compile_errors:
-                    status_parts.append(f"compile_err={compile_errors}")
-                if compile_warnings:
-                    status_parts.append(f"warnings={compile_warnings}")
-                if test_fail:
-                    status_parts.append(f"test_fail={test_fail}")
-                if test_notrun:
-                    status_parts.append(f"test_notrun={test_notrun}")
-                if test_pass:
-                    status_parts.append(f"test_pass={test_pass}")
-
-                status = ", ".join(status_parts) if status_parts else "OK"
-                marker = "!!!" if has_issues else ""
-                lines.append(
-                    f"- {marker}[id={build_id}] {name} @ {site}: {status}"
-                )
-                shown += 1
-
-        if shown < len(builds):
-            lines.append(f"  ... and {len(builds) - shown} more builds")
-        lines.append("")
-
-    return "\n".join(lines)
+        w(f"## {group_name} ({len(builds)} builds)\n")
+        w("\n")
+
+        # Show every build with issues (worst first), then fill up to 20 with
+        # clean builds in dashboard order.
+        with_issues.sort(key=lambda item: -item[1].issues)
+        clean = [item for item in parsed if not item[1].issues]
+        shown = with_issues + clean[: max(0, 20 - len(with_issues))]
+        for build, counts in shown:
+            g = build.get
+            name = g("buildname", "?")
+            site = g("site", "?")
+            build_id = g("id", "?")
+            marker = "!!!" if counts.issues else ""
+            w(f"- {marker}[id={build_id}] {name} @ {site}: {_build_status(counts)}\n")
+
+        if len(shown) < len(builds):
+            w(f"  ... and {len(builds) - len(shown)} more builds\n")
+        w("\n")
+
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -147,56 +310,56 @@ async def get_failing_tests(
     except CDashError as e:
         return f"Error: {e}"
 
-    limit = max(1, min(limit, 200))
-    offset = max(0, offset)
+    limit, offset = _clamp(limit, offset)
 
-    lines: list[str] = []
-    lines.append(f"# Failing Tests for {project}")
-    lines.append("")
+    buf, w = _buf()
+    w(f"# Failing Tests for {project}\n")
+    w("\n")
 
     tests = data.get("builds", [])
     if not tests:
-        lines.append("No failing tests found.")
-        return "\n".join(lines)
+        w("No failing tests found.\n")
+        return buf.getvalue()
 
     total = len(tests)
-    page = tests[offset : offset + limit]
+    page = _page(tests, limit, offset)
 
     if not page:
-        lines.append(
+        w(
             f"Found {total} non-passing test result(s)"
-            f" — no results in this range (offset={offset})."
+            f" — no results in this range (offset={offset}).\n"
         )
-        return "\n".join(lines)
+        return buf.getvalue()
 
-    lines.append(
+    w(
         f"Found {total} non-passing test result(s)"
-        f" (showing {offset + 1}–{offset + len(page)}):"
+        f" (showing {offset + 1}–{offset + len(page)}):\n"
     )
-    lines.append("")
+    w("\n")
 
     for t in page:
-        test_name_val = t.get("testname", "?")
-        status = t.get("status", "?")
-        build_name = t.get("buildName", "?")
-        site = t.get("site", "?")
-        details = t.get("details", "")
-        build_id_val = t.get("buildid", "?")
-
-        lines.append(f"- **{test_name_val}** [{status}]")
-        lines.append(f"  Build: {build_name} @ {site} (build_id={build_id_val})")
+        g = t.get
+        test_name_val = g("testname", "?")
+        status = g("status", "?")
+        build_name = g("buildName", "?")
+        site = g("site", "?")
+        details = g("details", "")
+        build_id_val = g("buildid", "?")
+
+        w(f"- **{test_name_val}** [{status}]\n")
+        w(f"  Build: {build_name} @ {site} (build_id={build_id_val})\n")
         if details:
             # Truncate long details
             if len(details) > 200:
-                details = details[:200] + "..."
-            lines.append(f"  Details: {details}")
-        lines.append("")
+                details = f"{details[:200]}..."
+            w(f"  Details: {details}\n")
+        w("\n")
 
     remaining = total - offset - len(page)
     if remaining > 0:
-        lines.append(f"... {remaining} more (use offset={offset + limit} to see next page)")
+        w(f"... {remaining} more (use offset={offset + limit} to see next page)\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -220,60 +383,60 @@ async def get_build_details(
     except CDashError as e:
         return f"Error: {e}"
 
-    lines: list[str] = []
+    buf, w = _buf()
 
-    build = data.get("build", {})
+    build = data.get("build", _EMPTY)
     build_name = build.get("name", "?")
     site = build.get("site", "?")
     build_type = build.get("type", "?")
     start_time = build.get("starttime", "?")
-    lines.append(f"# Build: {build_name}")
-    lines.append(f"**Site**: {site}  ")
-    lines.append(f"**Type**: {build_type}  ")
-    lines.append(f"**Started**: {start_time}  ")
-    lines.append(f"**Build ID**: {build_id}")
-    lines.append("")
+    w(f"# Build: {build_name}\n")
+    w(f"**Site**: {site}  \n")
+    w(f"**Type**: {build_type}  \n")
+    w(f"**Started**: {start_time}  \n")
+    w(f"**Build ID**: {build_id}\n")
+    w("\n")
 
     # Configure summary
-    configure = data.get("configure", {})
+    configure = data.get("configure", _EMPTY)
     if configure:
         conf_errors = configure.get("nerrors", 0)
         conf_warnings = configure.get("nwarnings", 0)
         conf_status = "PASS" if conf_errors == 0 else "FAIL"
-        lines.append(
+        w(
             f"## Configure: {conf_status} "
-            f"({conf_errors} errors, {conf_warnings} warnings)"
+            f"({conf_errors} errors, {conf_warnings} warnings)\n"
         )
-        lines.append("")
+        w("\n")
 
     # Test summary
-    test = data.get("test", {})
+    test = data.get("test", _EMPTY)
     if test:
         test_pass = test.get("pass", 0)
         test_fail = test.get("fail", 0)
         test_notrun = test.get("notrun", 0)
-        lines.append(
+        w(
             f"## Tests: {test_pass} passed, {test_fail} failed, "
-            f"{test_notrun} not run"
+            f"{test_notrun} not run\n"
         )
-        lines.append("")
+        w("\n")
 
     # Previous build comparison
-    prev = data.get("previousbuild", {})
+    prev = data.get("previousbuild", _EMPTY)
     if prev and prev.get("id"):
         prev_id = prev["id"]
-        lines.append(f"## Previous build: id={prev_id}")
-        lines.append("")
+        w(f"## Previous build: id={prev_id}\n")
+        w("\n")
 
     # Update info
-    update = data.get("update", {})
+    update = data.get("update", _EMPTY)
     if update:
         n_files = update.get("files", 0)
         if n_files:
-            lines.append(f"## Source changes: {n_files} file(s) updated")
-            lines.append("")
+            w(f"## Source changes: {n_files} file(s) updated\n")
+            w("\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -303,58 +466,57 @@ async def get_build_errors(
     except CDashError as e:
         return f"Error: {e}"
 
-    limit = max(1, min(limit, 200))
-    offset = max(0, offset)
+    limit, offset = _clamp(limit, offset)
 
     label = "Warnings" if warnings else "Errors"
-    lines: list[str] = []
-    lines.append(f"# Build {label} (build_id={build_id})")
-    lines.append("")
+    buf, w = _buf()
+    w(f"# Build {label} (build_id={build_id})\n")
+    w("\n")
 
     errors = data.get("errors", [])
     if not errors:
-        lines.append(f"No {label.lower()} found.")
-        return "\n".join(lines)
+        w(f"No {label.lower()} found.\n")
+        return buf.getvalue()
 
     total = len(errors)
-    page = errors[offset : offset + limit]
+    page = _page(errors, limit, offset)
 
     if not page:
-        lines.append(f"Found {total} {label.lower()} — no results in this range (offset={offset}).")
-        return "\n".join(lines)
+        w(f"Found {total} {label.lower()} — no results in this range (offset={offset}).\n")
+        return buf.getvalue()
 
-    lines.append(f"Found {total} {label.lower()} (showing {offset + 1}–{offset + len(page)}):")
-    lines.append("")
+    w(f"Found {total} {label.lower()} (showing {offset + 1}–{offset + len(page)}):\n")
+    w("\n")
 
     for err in page:
-        source_file = err.get("sourcefile", "")
-        source_line = err.get("sourceline", "")
-        text = err.get("text", "").strip()
-        precontext = err.get("precontext", "")
-        postcontext = err.get("postcontext", "")
+        g = err.get
+        source_file = g("sourcefile", "")
+        source_line = g("sourceline", "")
+        text = g("text", "").strip()
+        precontext = g("precontext", "")
+        postcontext = g("postcontext", "")
 
         if source_file:
             loc = f"{source_file}:{source_line}" if source_line else source_file
-            lines.append(f"### {loc}")
+            w(f"### {loc}\n")
         else:
-            lines.append("### (no source location)")
+            w("### (no source location)\n")
 
         if precontext:
-            lines.append(f"```\n{precontext}\n```")
+            w(f"```\n{precontext}\n```\n")
         if text:
             # Truncate very long error messages
-            if len(text) > 500:
-                text = text[:500] + "..."
-            lines.append(f"```\n{text}\n```")
+            text = _truncate_bytes(text, 500, "...")
+            w(f"```\n{text}\n```\n")
         if postcontext:
-            lines.append(f"```\n{postcontext}\n```")
-        lines.append("")
+            w(f"```\n{postcontext}\n```\n")
+        w("\n")
 
     remaining = total - offset - len(page)
     if remaining > 0:
-        lines.append(f"... {remaining} more (use offset={offset + limit} to see next page)")
+        w(f"... {remaining} more (use offset={offset + limit} to see next page)\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -384,53 +546,52 @@ async def get_build_tests(
     except CDashError as e:
         return f"Error: {e}"
 
-    limit = max(1, min(limit, 200))
-    offset = max(0, offset)
+    limit, offset = _clamp(limit, offset)
 
-    lines: list[str] = []
+    buf, w = _buf()
     filter_label = f" ({status_filter})" if status_filter else ""
-    lines.append(f"# Tests for build {build_id}{filter_label}")
-    lines.append("")
+    w(f"# Tests for build {build_id}{filter_label}\n")
+    w("\n")
 
     tests = data.get("tests", [])
     if not tests:
-        lines.append("No tests found.")
-        return "\n".join(lines)
+        w("No tests found.\n")
+        return buf.getvalue()
 
     total = len(tests)
-    page = tests[offset : offset + limit]
+    page = _page(tests, limit, offset)
 
     if not page:
-        lines.append(f"Found {total} test(s) — no results in this range (offset={offset}).")
-        return "\n".join(lines)
+        w(f"Found {total} test(s) — no results in this range (offset={offset}).\n")
+        return buf.getvalue()
 
-    lines.append(f"Found {total} test(s) (showing {offset + 1}–{offset + len(page)}):")
-    lines.append("")
+    w(f"Found {total} test(s) (showing {offset + 1}–{offset + len(page)}):\n")
+    w("\n")
 
     for t in page:
-        name = t.get("name", "?")
-        status = t.get("status", "?")
-        exec_time = t.get("execTime", "?")
-        details = t.get("details", "")
-        build_test_id = t.get("buildtestid", "")
-
-        status_icon = {"Passed": "+", "Failed": "!", "Not Run": "-"}.get(
-            status, "?"
-        )
+        g = t.get
+        name = g("name", "?")
+        status = g("status", "?")
+        exec_time = g("execTime", "?")
+        details = g("details", "")
+        build_test_id = g("buildtestid", "")
+
+        status_icon = _STATUS_ICON.get(status, "?")
         line = f"- [{status_icon}] **{name}** ({status}, {exec_time}s)"
         if build_test_id:
             line += f" [buildtestid={build_test_id}]"
         if details:
             if len(details) > 150:
-                details = details[:150] + "..."
+                details = f"{details[:150]}..."
             line += f" — {details}"
-        lines.append(line)
+        w(line)
+        w("\n")
 
     remaining = total - offset - len(page)
     if remaining > 0:
-        lines.append(f"\n... {remaining} more (use offset={offset + limit} to see next page)")
+        w(f"\n... {remaining} more (use offset={offset + limit} to see next page)\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -454,14 +615,14 @@ async def get_configure_output(
     except CDashError as e:
         return f"Error: {e}"
 
-    lines: list[str] = []
-    lines.append(f"# Configure Output (build_id={build_id})")
-    lines.append("")
+    buf, w = _buf()
+    w(f"# Configure Output (build_id={build_id})\n")
+    w("\n")
 
     configures = data.get("configures", [])
     if not configures:
-        lines.append("No configure output found.")
-        return "\n".join(lines)
+        w("No configure output found.\n")
+        return buf.getvalue()
 
     for conf in configures:
         command = conf.get("command", "")
@@ -469,22 +630,23 @@ async def get_configure_output(
         status = conf.get("status", "?")
 
         status_label = "PASS" if str(status) == "0" else f"FAIL (status={status})"
-        lines.append(f"**Status**: {status_label}")
-        lines.append("")
+        w(f"**Status**: {status_label}\n")
+        w("\n")
 
         if command:
-            lines.append("**Command**:")
-            lines.append(f"```\n{command}\n```")
-            lines.append("")
+            w("**Command**:\n")
+            w(f"```\n{command}\n```\n")
+            w("\n")
 
         if output:
             # Truncate very long output
-            if len(output) > 5000:
-                output = output[:5000] + "\n... (truncated, showing first 5000 chars)"
-            lines.append("**Output**:")
-            lines.append(f"```\n{output}\n```")
+            output = _truncate_bytes(
+                output, 5000, "\n... (truncated, showing first 5000 bytes)"
+            )
+            w("**Output**:\n")
+            w(f"```\n{output}\n```\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -508,41 +670,40 @@ async def get_test_details(
     except CDashError as e:
         return f"Error: {e}"
 
-    lines: list[str] = []
+    buf, w = _buf()
 
-    test = data.get("test", {})
+    test = data.get("test", _EMPTY)
     test_name = test.get("test", test.get("name", "?"))
     status = test.get("status", "?")
     command = test.get("command", "")
     output = test.get("output", "")
 
-    lines.append(f"# Test Details: {test_name}")
-    lines.append(f"**Status**: {status}")
-    lines.append(f"**Build-Test ID**: {build_test_id}")
-    lines.append("")
+    w(f"# Test Details: {test_name}\n")
+    w(f"**Status**: {status}\n")
+    w(f"**Build-Test ID**: {build_test_id}\n")
+    w("\n")
 
     if command:
-        lines.append("**Command**:")
-        lines.append(f"```\n{command}\n```")
-        lines.append("")
+        w("**Command**:\n")
+        w(f"```\n{command}\n```\n")
+        w("\n")
 
     # Measurements
     measurements = test.get("measurements", [])
     if measurements:
-        lines.append("## Measurements")
+        w("## Measurements\n")
         for m in measurements:
             name = m.get("name", "?")
             value = m.get("value", "?")
-            lines.append(f"- **{name}**: {value}")
-        lines.append("")
+            w(f"- **{name}**: {value}\n")
+        w("\n")
 
     if output:
-        if len(output) > 8000:
-            output = output[:8000] + "\n... (truncated, showing first 8000 chars)"
-        lines.append("## Output")
-        lines.append(f"```\n{output}\n```")
+        output = _truncate_bytes(output, 8000, "\n... (truncated, showing first 8000 bytes)")
+        w("## Output\n")
+        w(f"```\n{output}\n```\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -574,65 +735,64 @@ async def get_test_summary(
     except CDashError as e:
         return f"Error: {e}"
 
-    limit = max(1, min(limit, 200))
-    offset = max(0, offset)
+    limit, offset = _clamp(limit, offset)
 
-    lines: list[str] = []
-    lines.append(f"# Test Summary: {test_name}")
-    lines.append("")
+    buf, w = _buf()
+    w(f"# Test Summary: {test_name}\n")
+    w("\n")
 
     num_failed = data.get("numfailed", 0)
     num_total = data.get("numtotal", 0)
     pct_passed = data.get("percentagepassed", 0)
-    lines.append(
+    w(
         f"**Results**: {num_total - num_failed}/{num_total} passed "
-        f"({pct_passed:.1f}%)"
+        f"({pct_passed:.1f}%)\n"
     )
-    lines.append("")
+    w("\n")
 
     builds = data.get("builds", [])
     if not builds:
-        lines.append("No build results found.")
-        return "\n".join(lines)
+        w("No build results found.\n")
+        return buf.getvalue()
 
     total = len(builds)
-    page = builds[offset : offset + limit]
+    page = _page(builds, limit, offset)
 
     if not page:
-        lines.append(
+        w(
             f"Results across {total} build(s)"
-            f" — no results in this range (offset={offset})."
+            f" — no results in this range (offset={offset}).\n"
         )
-        return "\n".join(lines)
+        return buf.getvalue()
 
-    lines.append(f"## Results across {total} build(s) (showing {offset + 1}–{offset + len(page)}):")
-    lines.append("")
+    w(f"## Results across {total} build(s) (showing {offset + 1}–{offset + len(page)}):\n")
+    w("\n")
 
     for b in page:
-        site = b.get("site", "?")
-        build_name = b.get("buildName", "?")
-        status = b.get("status", "?")
-        time_val = b.get("time", "?")
-        build_id = b.get("buildid", "?")
-        status_icon = {"Passed": "+", "Failed": "!", "Not Run": "-"}.get(
-            status, "?"
-        )
+        g = b.get
+        site = g("site", "?")
+        build_name = g("buildName", "?")
+        status = g("status", "?")
+        time_val = g("time", "?")
+        build_id = g("buildid", "?")
+        status_icon = _STATUS_ICON.get(status, "?")
 
         line = (
             f"- [{status_icon}] **{status}** — {build_name} @ {site} "
             f"(build_id={build_id}, time={time_val}s)"
         )
 
-        update = b.get("update", {})
+        update = g("update", _EMPTY)
         if update and update.get("revision"):
             line += f" rev={update['revision'][:12]}"
-        lines.append(line)
+        w(line)
+        w("\n")
 
     remaining = total - offset - len(page)
     if remaining > 0:
-        lines.append(f"\n... {remaining} more (use offset={offset + limit} to see next page)")
+        w(f"\n... {remaining} more (use offset={offset + limit} to see next page)\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -656,27 +816,27 @@ async def get_build_update(
     except CDashError as e:
         return f"Error: {e}"
 
-    lines: list[str] = []
-    lines.append(f"# Source Updates (build_id={build_id})")
-    lines.append("")
+    buf, w = _buf()
+    w(f"# Source Updates (build_id={build_id})\n")
+    w("\n")
 
-    update = data.get("update", {})
+    update = data.get("update", _EMPTY)
     if update:
         revision = update.get("revision", "")
         prior = update.get("priorrevision", "")
         if revision:
-            lines.append(f"**Revision**: {revision}")
+            w(f"**Revision**: {revision}\n")
         if prior:
-            lines.append(f"**Prior revision**: {prior}")
+            w(f"**Prior revision**: {prior}\n")
         diff_url = update.get("revisiondiff", "")
         if diff_url:
-            lines.append(f"**Diff URL**: {diff_url}")
-        lines.append("")
+            w(f"**Diff URL**: {diff_url}\n")
+        w("\n")
 
     update_groups = data.get("updategroups", [])
     if not update_groups:
-        lines.append("No source changes found.")
-        return "\n".join(lines)
+        w("No source changes found.\n")
+        return buf.getvalue()
 
     total_files = 0
     for group in update_groups:
@@ -685,8 +845,8 @@ async def get_build_update(
         if not directories:
             continue
 
-        lines.append(f"## {description}")
-        lines.append("")
+        w(f"## {description}\n")
+        w("\n")
 
         for d in directories:
             dir_name = d.get("name", ".")
@@ -701,19 +861,20 @@ async def get_build_update(
                 line = f"- `{path}` by **{author}**"
                 if revision:
                     line += f" ({revision[:12]})"
-                lines.append(line)
+                w(line)
+                w("\n")
                 if log:
                     if len(log) > 200:
-                        log = log[:200] + "..."
-                    lines.append(f"  {log}")
+                        log = f"{log[:200]}..."
+                    w(f"  {log}\n")
                 total_files += 1
 
-        lines.append("")
+        w("\n")
 
     if total_files == 0:
-        lines.append("No source changes found.")
+        w("No source changes found.\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -739,63 +900,63 @@ async def get_project_overview(
     except CDashError as e:
         return f"Error: {e}"
 
-    lines: list[str] = []
+    buf, w = _buf()
     title = data.get("title", f"{project} - Overview")
-    lines.append(f"# {title}")
-    lines.append("")
+    w(f"# {title}\n")
+    w("\n")
 
     has_sub = data.get("hasSubProjects", False)
     if has_sub:
-        lines.append("*This project has subprojects.*")
-        lines.append("")
+        w("*This project has subprojects.*\n")
+        w("\n")
 
     # Build groups
     groups = data.get("groups", [])
     if groups:
         group_names = [g.get("name", "?") for g in groups]
-        lines.append(f"**Build groups**: {', '.join(group_names)}")
-        lines.append("")
+        w(f"**Build groups**: {', '.join(group_names)}\n")
+        w("\n")
 
     # Coverage data
     coverages = data.get("coverages", [])
     if coverages:
-        lines.append("## Coverage")
+        w("## Coverage\n")
         for cov in coverages:
             name = cov.get("name", "?")
-            lines.append(f"### {name}")
-            current = cov.get("current", {})
-            previous = cov.get("previous", {})
+            w(f"### {name}\n")
+            current = cov.get("current", _EMPTY)
+            previous = cov.get("previous", _EMPTY)
             if current:
-                lines.append(f"  Current: {current}")
+                w(f"  Current: {current}\n")
             if previous:
-                lines.append(f"  Previous: {previous}")
-        lines.append("")
+                w(f"  Previous: {previous}\n")
+        w("\n")
 
     # Dynamic analysis
     dyn = data.get("dynamicanalyses", [])
     if dyn:
-        lines.append("## Dynamic Analysis")
+        w("## Dynamic Analysis\n")
         for d in dyn:
-            lines.append(f"- {d.get('name', '?')}")
-        lines.append("")
+            w(f"- {d.get('name', '?')}\n")
+        w("\n")
 
     # Static analysis
     static = data.get("staticanalyses", [])
     if static:
-        lines.append("## Static Analysis")
+        w("## Static Analysis\n")
         for s in static:
-            lines.append(f"- {s.get('name', '?')}")
-        lines.append("")
+            w(f"- {s.get('name', '?')}\n")
+        w("\n")
 
     # Measurements
     measurements = data.get("measurements", [])
     if measurements:
-        lines.append("## Measurements")
+        w("## Measurements\n")
         for m in measurements:
-            lines.append(f"- {m.get('name', '?')}")
-        lines.append("")
+            w(f"- {m.get('name', '?')}\n")
+        w("\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -829,55 +990,53 @@ async def get_coverage_comparison(
     except CDashError as e:
         return f"Error: {e}"
 
-    limit = max(1, min(limit, 200))
-    offset = max(0, offset)
+    limit, offset = _clamp(limit, offset)
 
-    lines: list[str] = []
-    lines.append(f"# Coverage Comparison — {project}")
-    lines.append("")
+    buf, w = _buf()
+    w(f"# Coverage Comparison — {project}\n")
+    w("\n")
 
     total_records = data.get("iTotalRecords", 0)
     total_display = data.get("iTotalDisplayRecords", 0)
 
-    lines.append(f"**Total files**: {total_records}")
+    w(f"**Total files**: {total_records}\n")
     if total_display != total_records:
-        lines.append(f"**Displayed**: {total_display}")
-    lines.append("")
+        w(f"**Displayed**: {total_display}\n")
+    w("\n")
 
     rows = data.get("aaData", [])
     if not rows:
-        lines.append("No coverage data found.")
-        return "\n".join(lines)
+        w("No coverage data found.\n")
+        return buf.getvalue()
 
     total = len(rows)
-    page = rows[offset : offset + limit]
+    page = _page(rows, limit, offset)
 
     if not page:
-        lines.append(f"## Files ({total} total) — no results in this range (offset={offset}).")
-        return "\n".join(lines)
+        w(f"## Files ({total} total) — no results in this range (offset={offset}).\n")
+        return buf.getvalue()
 
-    lines.append(f"## Files ({total} total, showing {offset + 1}–{offset + len(page)})")
-    lines.append("")
+    w(f"## Files ({total} total, showing {offset + 1}–{offset + len(page)})\n")
+    w("\n")
 
     # CDash returns rows as arrays: [filename, status, percentage, untested, ...]
+    # with HTML markup in the cells
     for row in page:
         if len(row) >= 4:
-            filename = row[0]
-            # Strip HTML tags from filename
-            filename_clean = re.sub(r"<[^>]+>", "", str(filename)).strip()
-            status = re.sub(r"<[^>]+>", "", str(row[1])).strip()
-            pct = re.sub(r"<[^>]+>", "", str(row[2])).strip()
-            untested = re.sub(r"<[^>]+>", "", str(row[3])).strip()
-
-            lines.append(f"- `{filename_clean}`: {status} ({pct}) — {untested}")
+            filename_clean = _strip_tags(row[0])
+            status = _strip_tags(row[1])
+            pct = _strip_tags(row[2])
+            untested = _strip_tags(row[3])
+
+            w(f"- `{filename_clean}`: {status} ({pct}) — {untested}\n")
         else:
-            lines.append(f"- {row}")
+            w(f"- {row}\n")
 
     remaining = total - offset - len(page)
     if remaining > 0:
-        lines.append(f"\n... {remaining} more (use offset={offset + limit} to see next page)")
+        w(f"\n... {remaining} more (use offset={offset + limit} to see next page)\n")
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -894,6 +1053,8 @@ async def get_dynamic_analysis(
 ) -> str:
     """Get dynamic analysis results (e.g. Valgrind, sanitizers) for a build.
 
+    Tests with defects are listed most defects first.
+
     Args:
         build_id: The CDash build ID.
         limit: Maximum number of defect entries to return (default 50, max 200).
@@ -905,75 +1066,184 @@ async def get_dynamic_analysis(
     except CDashError as e:
         return f"Error: {e}"
 
-    limit = max(1, min(limit, 200))
-    offset = max(0, offset)
+    limit, offset = _clamp(limit, offset)
 
-    lines: list[str] = []
+    buf, w = _buf()
     title = data.get("title", f"Dynamic Analysis (build_id={build_id})")
-    lines.append(f"# {title}")
-    lines.append("")
+    w(f"# {title}\n")
+    w("\n")
 
-    build = data.get("build", {})
+    build = data.get("build", _EMPTY)
     if build:
-        lines.append(f"**Build**: {build.get('buildname', '?')}")
-        lines.append(f"**Site**: {build.get('site', '?')}")
-        lines.append(f"**Time**: {build.get('buildtime', '?')}")
-        lines.append("")
+        w(f"**Build**: {build.get('buildname', '?')}\n")
+        w(f"**Site**: {build.get('site', '?')}\n")
+        w(f"**Time**: {build.get('buildtime', '?')}\n")
+        w("\n")
 
     # Defect type legend
     defect_types = data.get("defecttypes", [])
     if defect_types:
         type_names = [d.get("type", "?") for d in defect_types]
-        lines.append(f"**Defect types**: {', '.join(type_names)}")
-        lines.append("")
+        w(f"**Defect types**: {', '.join(type_names)}\n")
+        w("\n")
 
     analyses = data.get("dynamicanalyses", [])
     if not analyses:
-        lines.append("No dynamic analysis results found.")
-        return "\n".join(lines)
-
-    lines.append(f"## Results ({len(analyses)} tests)")
-    lines.append("")
-
-    # Show tests with defects first, then clean ones
-    with_defects = []
-    clean = 0
-    for a in analyses:
-        name = a.get("name", "?")
-        status = a.get("status", "?")
-        defects = a.get("defects", [])
-        try:
-            total_defects = sum(int(d) for d in defects)
-        except (ValueError, TypeError):
-            total_defects = 0
+        w("No dynamic analysis results found.\n")
+        return buf.getvalue()
 
-        if total_defects > 0:
-            with_defects.append((name, status, defects, total_defects))
-        else:
-            clean += 1
+    w(f"## Results ({len(analyses)} tests)\n")
+    w("\n")
 
+    # Only the requested page of tests with defects (most defects first) is
+    # ordered: a bounded heap instead of sorting every analysis.
+    counted = [(a, _defect_count(a)) for a in analyses]
+    with_defects = [item for item in counted if item[1] > 0]
     total = len(with_defects)
-    page = with_defects[offset : offset + limit]
+    clean = len(counted) - total
+    top = heapq.nlargest(offset + limit, with_defects, key=itemgetter(1))
+    page = _page(top, limit, offset)
 
     if not page and total > 0:
-        lines.append(f"{total} test(s) with defects — no results in this range (offset={offset}).")
+        w(f"{total} test(s) with defects — no results in this range (offset={offset}).\n")
     elif page:
-        lines.append(f"Showing defects {offset + 1}–{offset + len(page)} of {total}:")
-        lines.append("")
-        for name, status, defects, total_defects in page:
-            lines.append(f"- **{name}** [{status}] — {total_defects} defect(s)")
+        w(f"Showing defects {offset + 1}–{offset + len(page)} of {total}:\n")
+        w("\n")
+        for a, total_defects in page:
+            w(
+                f"- **{a.get('name', '?')}** [{a.get('status', '?')}] — "
+                f"{total_defects} defect(s)\n"
+            )
 
         remaining = total - offset - len(page)
         if remaining > 0:
-            lines.append(
+            w(
                 f"\n... {remaining} more with defects"
-                f" (use offset={offset + limit} to see next page)"
+                f" (use offset={offset + limit} to see next page)\n"
             )
 
     if clean:
-        lines.append(f"\n{clean} test(s) with no defects (clean)")
+        w(f"\n{clean} test(s) with no defects (clean)\n")
+
+    return buf.getvalue()
+
+
+def _triage_section(build: dict, result: dict | CDashError) -> str:
+    """Render one build's triage_failures entry from its get_build_errors result."""
+    buf, w = _buf()
+    build_id = build["id"]
+    w(
+        f"## [id={build_id}] {build.get('buildname', '?')} @ {build.get('site', '?')}: "
+        f"{_build_status(_build_counts(build))}\n"
+    )
+    if isinstance(result, CDashError):
+        w(f"Could not fetch build errors: {result}\n")
+        w("\n")
+        return buf.getvalue()
+
+    errors = result.get("errors", [])
+    if not errors:
+        w(
+            "No compiler errors; use get_build_tests or get_configure_output "
+            f"with build_id={build_id}.\n"
+        )
+        w("\n")
+        return buf.getvalue()
+
+    for err in errors[:_TRIAGE_ERRORS_PER_BUILD]:
+        g = err.get
+        source_file = g("sourcefile", "")
+        source_line = g("sourceline", "")
+        if source_file:
+            loc = f"{source_file}:{source_line}" if source_line else source_file
+        else:
+            loc = "(no source location)"
+        text = g("text", "").strip().split("\n", 1)[0]
+        if len(text) > 200:
+            text = f"{text[:200]}..."
+        w(f"- `{loc}`: {text}\n")
+    if len(errors) > _TRIAGE_ERRORS_PER_BUILD:
+        w(
+            f"- ... {len(errors) - _TRIAGE_ERRORS_PER_BUILD} more "
+            f"(use get_build_errors with build_id={build_id})\n"
+        )
+    w("\n")
+    return buf.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Tool: triage_failures
+# ---------------------------------------------------------------------------
+
+
+@mcp.tool()
+async def triage_failures(
+    project: str,
+    date: str | None = None,
+    max_builds: int = 10,
+    ctx: Context = None,
+) -> str:
+    """Triage a dashboard in one call: failing builds with their first compiler errors.
+
+    Build errors for the failing builds are fetched concurrently, and progress
+    is reported as each build's errors arrive.
+
+    Args:
+        project: CDash project name (e.g. "PublicDashboard").
+        date: Optional date (YYYY-MM-DD). Defaults to today.
+        max_builds: Maximum number of failing builds to inspect (default 10, max 50).
+    """
+    client = _get_client(ctx)
+    try:
+        data = await client.get_dashboard(project, date)
+    except CDashError as e:
+        return f"Error: {e}"
+
+    max_builds = max(1, min(max_builds, 50))
+
+    buf, w = _buf()
+    title = data.get("title", project)
+    dashboard_date = data.get("datetime", date or "today")
+    w(f"# {title} - Triage ({dashboard_date})\n")
+    w("\n")
+
+    failing = [
+        (build, issue_count)
+        for group in data.get("buildgroups", [])
+        for build in group.get("builds", [])
+        if build.get("id") and (issue_count := _build_counts(build).issues)
+    ]
+    if not failing:
+        w("No failing builds found.\n")
+        return buf.getvalue()
+
+    failing.sort(key=lambda item: -item[1])
+    selected = [build for build, _ in failing[:max_builds]]
+    w(f"Found {len(failing)} build(s) with issues (showing {len(selected)}, worst first).\n")
+    w("\n")
+
+    sem = asyncio.Semaphore(8)
+    done = 0
+
+    async def triage(build: dict) -> str:
+        nonlocal done
+        async with sem:
+            try:
+                result = await client.get_build_errors(int(build["id"]))
+            except CDashError as e:
+                result = e
+        done += 1
+        _dbg("triage_failures: build %s ready (%d/%d)", build["id"], done, len(selected))
+        if ctx is not None:
+            await ctx.report_progress(
+                done, len(selected), message=f"build {build['id']} ready"
+            )
+        return _triage_section(build, result)
+
+    for section in await asyncio.gather(*(triage(b) for b in selected)):
+        w(section)
 
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 # ---------------------------------------------------------------------------
@@ -18,6 +18,26 @@ async def client():
         yield c
 
 
+def _first_build_id(dashboard: dict) -> int | None:
+    """Return the ID of the first build listed on a dashboard, if any."""
+    for group in dashboard.get("buildgroups", []):
+        for build in group.get("builds", []):
+            if build.get("id"):
+                return int(build["id"])
+    return None
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def build_id():
+    """A build ID from today's dashboard, fetched once for the whole module."""
+    async with CDashClient(base_url="https://open.cdash.org") as c:
+        dashboard = await c.get_dashboard(PROJECT)
+    found = _first_build_id(dashboard)
+    if found is None:
+        pytest.skip("No builds found on dashboard")
+    return found
+
+
 @pytest.mark.asyncio
 async def test_get_dashboard(client):
     """Dashboard returns buildgroups with builds. [AI]"""
@@ -49,84 +69,55 @@ async def test_query_tests_with_name_filter(client):
 
 
 @pytest.mark.asyncio
-async def test_get_build_summary(client):
-    """Build summary returns build info for a valid build ID. [AI]"""
-    # First get a build ID from the dashboard
-    dashboard = await client.get_dashboard(PROJECT)
-    build_id = None
-    for group in dashboard.get("buildgroups", []):
-        for build in group.get("builds", []):
-            build_id = build.get("id")
-            if build_id:
-                break
-        if build_id:
-            break
+async def test_query_tests_limit(client):
+    """Limit is pushed down to CDash and caps the returned rows. [AI]"""
+    data = await client.query_tests(PROJECT, limit=5)
+    assert len(data["builds"]) <= 5
 
-    if build_id is None:
-        pytest.skip("No builds found on dashboard")
 
-    data = await client.get_build_summary(int(build_id))
-    assert "build" in data
+@pytest.mark.asyncio
+async def test_query_tests_iter(client):
+    """Streaming query yields the same test rows as query_tests. [AI]"""
+    data = await client.query_tests(PROJECT)
+    streamed = [t async for t in client.query_tests_iter(PROJECT)]
+    assert len(streamed) == len(data["builds"])
+    assert all(isinstance(t, dict) for t in streamed)
 
 
 @pytest.mark.asyncio
-async def test_get_build_errors(client):
-    """Build errors endpoint returns errors list. [AI]"""
-    dashboard = await client.get_dashboard(PROJECT)
-    build_id = None
-    for group in dashboard.get("buildgroups", []):
-        for build in group.get("builds", []):
-            build_id = build.get("id")
-            if build_id:
-                break
-        if build_id:
-            break
+async def test_get_build_summary(client, build_id):
+    """Build summary returns build info for a valid build ID. [AI]"""
+    data = await client.get_build_summary(build_id)
+    assert "build" in data
 
-    if build_id is None:
-        pytest.skip("No builds found on dashboard")
 
-    data = await client.get_build_errors(int(build_id))
+@pytest.mark.asyncio
+async def test_get_build_errors(client, build_id):
+    """Build errors endpoint returns errors list. [AI]"""
+    data = await client.get_build_errors(build_id)
     assert "errors" in data
 
 
 @pytest.mark.asyncio
-async def test_get_build_tests(client):
+async def test_get_build_tests(client, build_id):
     """Build tests endpoint returns tests list. [AI]"""
-    dashboard = await client.get_dashboard(PROJECT)
-    build_id = None
-    for group in dashboard.get("buildgroups", []):
-        for build in group.get("builds", []):
-            build_id = build.get("id")
-            if build_id:
-                break
-        if build_id:
-            break
-
-    if build_id is None:
-        pytest.skip("No builds found on dashboard")
-
-    data = await client.get_build_tests(int(build_id))
+    data = await client.get_build_tests(build_id)
     assert "tests" in data
 
 
 @pytest.mark.asyncio
-async def test_get_configure(client):
+async def test_get_configure(client, build_id):
     """Configure endpoint returns configures list. [AI]"""
-    dashboard = await client.get_dashboard(PROJECT)
-    build_id = None
-    for group in dashboard.get("buildgroups", []):
-        for build in group.get("builds", []):
-            build_id = build.get("id")
-            if build_id:
-                break
-        if build_id:
-            break
+    data = await client.get_configure(build_id)
+    assert "configures" in data
 
-    if build_id is None:
-        pytest.skip("No builds found on dashboard")
 
-    data = await client.get_configure(int(build_id))
-    assert "configures" in data
+@pytest.mark.asyncio
+async def test_get_build_bundle(client, build_id):
+    """Build bundle returns every per-build section. [AI]"""
+    data = await client.get_build_bundle(build_id)
+    assert set(data) == {"summary", "errors", "warnings", "tests", "configure", "update"}
+    assert "build" in data["summary"]
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,237 @@
+"""Offline CDashClient tests against an httpx.MockTransport. [AI-Claude]"""
+
+import asyncio
+import gc
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from cdash_mcp.client import (
+    CDashClient,
+    CDashConnectionError,
+    CDashError,
+    CDashNotFoundError,
+)
+
+BASE_URL = "https://cdash.test"
+
+
+@asynccontextmanager
+async def _mock_client(
+    handler: Callable[[httpx.Request], httpx.Response], **kwargs
+) -> AsyncIterator[CDashClient]:
+    """Yield a CDashClient whose HTTP traffic is answered by ``handler``."""
+    transport = httpx.MockTransport(handler)
+    async with CDashClient(base_url=BASE_URL, **kwargs) as c:
+        async with httpx.AsyncClient(base_url=BASE_URL, transport=transport) as mock:
+            c._client = mock
+            yield c
+
+
+@pytest.mark.asyncio
+async def test_query_tests_iter_truncated_body():
+    """A truncated streamed body raises CDashError, not a raw ijson error. [AI]"""
+
+    def handler(request):
+        return httpx.Response(200, content=b'{"builds":[{"a":1},{"a":')
+
+    async with _mock_client(handler) as c:
+        with pytest.raises(CDashError, match="Invalid JSON"):
+            [t async for t in c.query_tests_iter("P")]
+
+
+@pytest.mark.asyncio
+async def test_query_tests_iter_protocol_error():
+    """A dropped streamed connection raises CDashConnectionError. [AI]"""
+
+    def handler(request):
+        raise httpx.RemoteProtocolError("peer closed connection", request=request)
+
+    async with _mock_client(handler) as c:
+        with pytest.raises(CDashConnectionError):
+            [t async for t in c.query_tests_iter("P")]
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_revalidated_with_304():
+    """An expired entry is revalidated and a 304 reuses the cached body. [AI]"""
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"build": {"id": 1}}, headers={"ETag": '"v1"'})
+
+    async with _mock_client(handler, cache_ttl=0) as c:
+        first = await c.get_build_summary(1)
+        second = await c.get_build_summary(1)
+
+    assert seen == [None, '"v1"']
+    assert first == second == {"build": {"id": 1}}
+
+
+@pytest.mark.asyncio
+async def test_test_details_outlive_cache_ttl():
+    """Immutable test details stay cached after cache_ttl has expired. [AI]"""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"test": {}})
+
+    async with _mock_client(handler, cache_ttl=0) as c:
+        for _ in range(2):
+            await c.get_test_details(5)
+            await c.get_build_summary(1)
+
+    assert calls.count("/api/v1/testDetails.php") == 1
+    assert calls.count("/api/v1/buildSummary.php") == 2
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Collapse the retry backoff to zero so retry tests run instantly."""
+    monkeypatch.setattr("cdash_mcp.client.random.uniform", lambda a, b: 0.0)
+
+
+@pytest.mark.asyncio
+async def test_gateway_errors_are_retried(no_backoff):
+    """502/503/504 responses are retried until one succeeds. [AI]"""
+    statuses = [503, 502, 200]
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(statuses[len(calls) - 1], json={"build": {}})
+
+    async with _mock_client(handler, max_retries=2) as c:
+        data = await c.get_build_summary(1)
+
+    assert len(calls) == 3
+    assert data == {"build": {}}
+
+
+@pytest.mark.asyncio
+async def test_retries_give_up_after_max_retries(no_backoff):
+    """A persistent gateway error surfaces after max_retries extra attempts. [AI]"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async with _mock_client(handler, max_retries=1) as c:
+        with pytest.raises(CDashError, match="503"):
+            await c.get_build_summary(1)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_not_retried(no_backoff):
+    """A timeout fails immediately instead of being retried. [AI]"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    async with _mock_client(handler, max_retries=2) as c:
+        with pytest.raises(CDashConnectionError, match="timed out"):
+            await c.get_build_summary(1)
+
+    assert len(calls) == 1
+
+
+def _gated_handler(gate: asyncio.Event, calls: list, status: int = 200):
+    """Async handler that holds every request until ``gate`` is set."""
+
+    async def handler(request):
+        calls.append(request)
+        await gate.wait()
+        return httpx.Response(status, json={"build": {"id": 1}})
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_gets_share_one_fetch():
+    """Concurrent identical GETs are coalesced into a single request. [AI]"""
+    gate, calls = asyncio.Event(), []
+
+    async with _mock_client(_gated_handler(gate, calls)) as c:
+        pending = asyncio.gather(*(c.get_build_summary(1) for _ in range(5)))
+        while not calls:  # let the shared fetch reach the transport
+            await asyncio.sleep(0)
+        gate.set()
+        results = await pending
+
+    assert len(calls) == 1
+    assert all(r == {"build": {"id": 1}} for r in results)
+
+
+@pytest.mark.asyncio
+async def test_shared_fetch_failure_reaches_every_waiter():
+    """A failed shared fetch raises in every waiting caller. [AI]"""
+    gate, calls = asyncio.Event(), []
+
+    async with _mock_client(_gated_handler(gate, calls, status=404)) as c:
+        pending = asyncio.gather(
+            *(c.get_build_summary(1) for _ in range(3)), return_exceptions=True
+        )
+        while not calls:  # let the shared fetch reach the transport
+            await asyncio.sleep(0)
+        gate.set()
+        results = await pending
+
+    assert len(calls) == 1
+    assert all(isinstance(r, CDashNotFoundError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_fetch():
+    """Cancelling one waiter leaves the shared fetch running for the others. [AI]"""
+    gate, calls = asyncio.Event(), []
+
+    async with _mock_client(_gated_handler(gate, calls)) as c:
+        first = asyncio.create_task(c.get_build_summary(1))
+        second = asyncio.create_task(c.get_build_summary(1))
+        while not calls:  # let the shared fetch reach the transport
+            await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+
+        assert await second == {"build": {"id": 1}}
+        assert first.cancelled()
+        # The completed fetch was cached, so a later call sends nothing.
+        assert await c.get_build_summary(1) == {"build": {"id": 1}}
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_without_waiters_is_not_logged():
+    """A shared fetch that fails after its only caller is cancelled is not
+    reported as "Task exception was never retrieved". [AI]"""
+    gate, calls, unhandled = asyncio.Event(), [], []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda _loop, context: unhandled.append(context))
+    try:
+        async with _mock_client(_gated_handler(gate, calls, status=404)) as c:
+            caller = asyncio.create_task(c.get_build_summary(1))
+            while not calls:  # let the shared fetch reach the transport
+                await asyncio.sleep(0)
+            caller.cancel()
+            gate.set()
+            while c._inflight:
+                await asyncio.sleep(0)
+            assert caller.cancelled()
+            del caller
+        gc.collect()
+    finally:
+        loop.set_exception_handler(None)
+
+    assert unhandled == []
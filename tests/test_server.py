@@ -1,12 +1,19 @@
 """MCP tool tests using in-process memory streams. [AI-Claude]"""
 
+import asyncio
+import re
+
 import anyio
 import pytest
+import pytest_asyncio
 from mcp.client.session import ClientSession
 from mcp.shared.message import SessionMessage
 
 PROJECT = "PublicDashboard"
 
+# Build IDs as rendered by get_dashboard ("[id=12345]")
+_BUILD_ID_RE = re.compile(r"id=(\d+)")
+
 
 async def _forward(reader, writer):
     """Forward messages from reader stream to writer stream."""
@@ -40,119 +47,130 @@ async def _run_with_client(fn):
         tg.cancel_scope.cancel()
 
 
-@pytest.mark.anyio
-async def test_list_tools():
-    """Server exposes all 12 tools. [AI]"""
-
-    async def check(client):
-        result = await client.list_tools()
-        tool_names = {t.name for t in result.tools}
-        expected = {
-            "get_dashboard",
-            "get_failing_tests",
-            "get_build_details",
-            "get_build_errors",
-            "get_build_tests",
-            "get_configure_output",
-            "get_test_details",
-            "get_test_summary",
-            "get_build_update",
-            "get_project_overview",
-            "get_coverage_comparison",
-            "get_dynamic_analysis",
-        }
-        assert expected == tool_names
-
-    await _run_with_client(check)
-
-
-@pytest.mark.anyio
-async def test_get_dashboard_tool():
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def mcp_client():
+    """One in-memory MCP client/server pair shared by every test in the module."""
+    session: asyncio.Future[ClientSession] = asyncio.get_running_loop().create_future()
+    stop = asyncio.Event()
+
+    async def serve(client):
+        session.set_result(client)
+        await stop.wait()
+
+    # The task group inside _run_with_client must be entered and exited by the
+    # same task, so the pair lives in a background task for the module's lifetime.
+    task = asyncio.create_task(_run_with_client(serve))
+    await asyncio.wait({session, task}, return_when=asyncio.FIRST_COMPLETED)
+    if not session.done():
+        task.result()
+    yield session.result()
+    stop.set()
+    await task
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def build_id(mcp_client):
+    """A build ID from the get_dashboard tool, looked up once for the whole module."""
+    dash = await mcp_client.call_tool("get_dashboard", {"project": PROJECT})
+    assert not dash.isError
+    ids = _BUILD_ID_RE.findall(dash.content[0].text)
+    assert ids, "No builds found on dashboard"
+    return int(ids[0])
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_list_tools(mcp_client):
+    """Server exposes all 13 tools. [AI]"""
+    result = await mcp_client.list_tools()
+    tool_names = {t.name for t in result.tools}
+    expected = {
+        "get_dashboard",
+        "get_failing_tests",
+        "get_build_details",
+        "get_build_errors",
+        "get_build_tests",
+        "get_configure_output",
+        "get_test_details",
+        "get_test_summary",
+        "get_build_update",
+        "get_project_overview",
+        "get_coverage_comparison",
+        "get_dynamic_analysis",
+        "triage_failures",
+    }
+    assert expected == tool_names
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_dashboard_tool(mcp_client):
     """get_dashboard tool returns formatted dashboard text. [AI]"""
+    result = await mcp_client.call_tool(
+        "get_dashboard", {"project": PROJECT}
+    )
+    assert not result.isError
+    text = result.content[0].text
+    assert "Dashboard" in text
 
-    async def check(client):
-        result = await client.call_tool(
-            "get_dashboard", {"project": PROJECT}
-        )
-        assert not result.isError
-        text = result.content[0].text
-        assert "Dashboard" in text
-
-    await _run_with_client(check)
 
-
-@pytest.mark.anyio
-async def test_get_failing_tests_tool():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_failing_tests_tool(mcp_client):
     """get_failing_tests tool returns formatted test results. [AI]"""
-
-    async def check(client):
-        result = await client.call_tool(
-            "get_failing_tests", {"project": PROJECT}
-        )
-        assert not result.isError
-        text = result.content[0].text
-        assert "Failing Tests" in text
-
-    await _run_with_client(check)
-
-
-@pytest.mark.anyio
-async def test_get_build_tests_pagination():
+    result = await mcp_client.call_tool(
+        "get_failing_tests", {"project": PROJECT}
+    )
+    assert not result.isError
+    text = result.content[0].text
+    assert "Failing Tests" in text
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_triage_failures_tool(mcp_client):
+    """triage_failures tool returns a formatted triage report. [AI]"""
+    result = await mcp_client.call_tool(
+        "triage_failures", {"project": PROJECT, "max_builds": 3}
+    )
+    assert not result.isError
+    text = result.content[0].text
+    assert "Triage" in text
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_build_tests_pagination(mcp_client, build_id):
     """get_build_tests respects limit and offset parameters. [AI]"""
-
-    async def check(client):
-        # First, get the dashboard to find a build with tests
-        dash = await client.call_tool(
-            "get_dashboard", {"project": PROJECT}
-        )
-        assert not dash.isError
-        text = dash.content[0].text
-        # Extract a build_id from dashboard output
-        import re
-        ids = re.findall(r"id=(\d+)", text)
-        assert ids, "No builds found on dashboard"
-        build_id = int(ids[0])
-
-        # Fetch first page with limit=2
-        page1 = await client.call_tool(
-            "get_build_tests",
-            {"build_id": build_id, "limit": 2, "offset": 0},
-        )
-        assert not page1.isError
-        text1 = page1.content[0].text
-
-        # Fetch second page with limit=2, offset=2
-        page2 = await client.call_tool(
-            "get_build_tests",
-            {"build_id": build_id, "limit": 2, "offset": 2},
-        )
-        assert not page2.isError
-        text2 = page2.content[0].text
-
-        # Both should mention the build, but show different ranges
-        assert f"build {build_id}" in text1
-        assert f"build {build_id}" in text2
-
-        # If there are tests, page 1 should show "1–" and page 2 "3–"
-        if "No tests found" not in text1:
-            assert "showing 1\u2013" in text1
-        if "No tests found" not in text2 and "no results in this range" not in text2:
-            assert "showing 3\u2013" in text2
-
-    await _run_with_client(check)
-
-
-@pytest.mark.anyio
-async def test_get_dashboard_invalid_project():
+    # Fetch first page with limit=2
+    page1 = await mcp_client.call_tool(
+        "get_build_tests",
+        {"build_id": build_id, "limit": 2, "offset": 0},
+    )
+    assert not page1.isError
+    text1 = page1.content[0].text
+
+    # Fetch second page with limit=2, offset=2
+    page2 = await mcp_client.call_tool(
+        "get_build_tests",
+        {"build_id": build_id, "limit": 2, "offset": 2},
+    )
+    assert not page2.isError
+    text2 = page2.content[0].text
+
+    # Both should mention the build, but show different ranges
+    assert f"build {build_id}" in text1
+    assert f"build {build_id}" in text2
+
+    # If there are tests, page 1 should show "1–" and page 2 "3–"
+    if "No tests found" not in text1:
+        assert "showing 1\u2013" in text1
+    if "No tests found" not in text2 and "no results in this range" not in text2:
+        assert "showing 3\u2013" in text2
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_dashboard_invalid_project(mcp_client):
     """get_dashboard with invalid project returns graceful response. [AI]"""
-
-    async def check(client):
-        result = await client.call_tool(
-            "get_dashboard", {"project": "NonExistentProject12345"}
-        )
-        # CDash may return empty data or error - tool should handle gracefully
-        assert not result.isError
-        text = result.content[0].text
-        assert isinstance(text, str)
-
-    await _run_with_client(check)
+    result = await mcp_client.call_tool(
+        "get_dashboard", {"project": "NonExistentProject12345"}
+    )
+    # CDash may return empty data or error - tool should handle gracefully
+    assert not result.isError
+    text = result.content[0].text
+    assert isinstance(text, str)
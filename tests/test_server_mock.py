@@ -0,0 +1,231 @@
+"""Offline MCP tool tests against a CDashClient on an httpx.MockTransport. [AI-Claude]"""
+
+import re
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from cdash_mcp import server
+from cdash_mcp.client import CDashClient
+
+from .test_client_mock import _mock_client
+
+# Build IDs as rendered in section headers and list items ("[id=12345]")
+_BUILD_ID_RE = re.compile(r"\[id=(\d+)\]")
+
+
+@asynccontextmanager
+async def _serving(
+    handler: Callable[[httpx.Request], httpx.Response],
+) -> AsyncIterator[CDashClient]:
+    """Resolve the tools' client to a mock-backed CDashClient, as lifespan does."""
+    async with _mock_client(handler) as c:
+        token = server._CLIENT_CV.set(c)
+        try:
+            yield c
+        finally:
+            server._CLIENT_CV.reset(token)
+
+
+def _build(
+    build_id: int,
+    *,
+    compile_err: int = 0,
+    warnings: int = 0,
+    test_fail: int = 0,
+    test_pass: int = 0,
+) -> dict:
+    """A dashboard build entry with the given counters."""
+    return {
+        "id": build_id,
+        "buildname": f"build-{build_id}",
+        "site": "site",
+        "compilation": {"error": compile_err, "warning": warnings},
+        "test": {"fail": test_fail, "pass": test_pass},
+    }
+
+
+def _dashboard(*groups: tuple[str, list[dict]]) -> dict:
+    """An index.php response with the given (name, builds) groups."""
+    return {
+        "title": "P",
+        "datetime": "2026-01-01",
+        "buildgroups": [{"name": name, "builds": builds} for name, builds in groups],
+    }
+
+
+@pytest.mark.asyncio
+async def test_triage_failures_worst_first():
+    """triage_failures inspects the worst max_builds builds, worst first. [AI]"""
+    builds = [
+        _build(1, test_fail=1),
+        _build(2, test_pass=9),
+        _build(3, compile_err=5),
+        _build(4, test_fail=3),
+    ]
+    errors = [
+        {"sourcefile": "a.c", "sourceline": "7", "text": "first\nsecond"},
+        {"sourcefile": "", "sourceline": "12", "text": "linker error"},
+    ]
+
+    def handler(request):
+        if request.url.path == "/api/v1/index.php":
+            return httpx.Response(200, json=_dashboard(("Nightly", builds)))
+        return httpx.Response(200, json={"errors": errors})
+
+    async with _serving(handler):
+        out = await server.triage_failures("P", max_builds=2)
+
+    assert "Found 3 build(s) with issues (showing 2, worst first)." in out
+    assert _BUILD_ID_RE.findall(out) == ["3", "4"]
+    assert "- `a.c:7`: first\n" in out
+    assert "- `(no source location)`: linker error\n" in out
+
+
+@pytest.mark.asyncio
+async def test_triage_failures_error_fetch_failure():
+    """A build whose errors cannot be fetched still gets a section. [AI]"""
+
+    def handler(request):
+        if request.url.path == "/api/v1/index.php":
+            return httpx.Response(200, json=_dashboard(("Nightly", [_build(7, compile_err=1)])))
+        return httpx.Response(404)
+
+    async with _serving(handler):
+        out = await server.triage_failures("P")
+
+    assert "## [id=7] build-7 @ site: compile_err=1\n" in out
+    assert "Could not fetch build errors: Resource not found" in out
+
+
+@pytest.mark.asyncio
+async def test_dynamic_analysis_pages_most_defects_first():
+    """Defects are listed most first, ties keep CDash order, offset pages on. [AI]"""
+    analyses = [
+        {"name": name, "status": "Failed", "defects": defects}
+        for name, defects in [
+            ("a", [1, 2]),
+            ("b", [0]),
+            ("c", [5]),
+            ("d", [3, 0]),
+            ("e", [1]),
+        ]
+    ]
+
+    def handler(request):
+        return httpx.Response(200, json={"dynamicanalyses": analyses})
+
+    async with _serving(handler):
+        pages = [
+            await server.get_dynamic_analysis(1, limit=2, offset=offset)
+            for offset in (0, 2, 4)
+        ]
+
+    names = [re.findall(r"- \*\*(\w)\*\*", page) for page in pages]
+    assert names == [["c", "a"], ["d", "e"], []]
+    assert "Showing defects 1–2 of 4:" in pages[0]
+    assert "(use offset=2 to see next page)" in pages[0]
+    assert "Showing defects 3–4 of 4:" in pages[1]
+    assert "more with defects" not in pages[1]
+    assert "4 test(s) with defects — no results in this range (offset=4)." in pages[2]
+    assert all("1 test(s) with no defects (clean)" in page for page in pages)
+
+
+@pytest.mark.parametrize(
+    ("text", "limit", "expected"),
+    [
+        ("short", 100, "short"),  # early return on character count
+        ("x" * 10, 10, "x" * 10),  # exactly at the byte limit
+        ("x" * 11, 10, "x" * 10 + "..."),
+        ("é" * 100, 51, "é" * 25 + "..."),  # 2-byte code point split at byte 51
+        ("😀" * 10, 10, "😀" * 2 + "..."),  # 4-byte code point split at byte 10
+    ],
+)
+def test_truncate_bytes(text, limit, expected):
+    """Output stays within limit bytes plus the suffix, never splitting a code point. [AI]"""
+    out = server._truncate_bytes(text, limit, "...")
+    assert out == expected
+    assert len(out.removesuffix("...").encode()) <= limit
+    assert "�" not in out
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [(None, 50), ("8", 8), ("0", 50), ("-3", 50), ("lots", 50)],
+)
+def test_pool_size(monkeypatch, raw, expected):
+    """CDASH_MCP_POOL_SIZE is used when positive, otherwise 50. [AI]"""
+    if raw is None:
+        monkeypatch.delenv("CDASH_MCP_POOL_SIZE", raising=False)
+    else:
+        monkeypatch.setenv("CDASH_MCP_POOL_SIZE", raw)
+    assert server._pool_size() == expected
+
+
+def _dashboard_handler(*groups: tuple[str, list[dict]]):
+    """Handler answering index.php with the given dashboard groups."""
+
+    def handler(request):
+        return httpx.Response(200, json=_dashboard(*groups))
+
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_dashboard_all_passing_group():
+    """A healthy group is one summary line plus at most 20 build IDs. [AI]"""
+    builds = [_build(i, test_pass=3) for i in range(1, 26)]
+
+    async with _serving(_dashboard_handler(("Nightly", builds))):
+        out = await server.get_dashboard("P")
+
+    assert "## Nightly (25 builds) — all passing\n" in out
+    assert "- [id=1] build-1 @ site\n" in out
+    assert _BUILD_ID_RE.findall(out) == [str(i) for i in range(1, 21)]
+    assert "  ... and 5 more builds\n" in out
+    assert "test_pass" not in out
+
+
+@pytest.mark.asyncio
+async def test_dashboard_warnings_only_group():
+    """Compile warnings keep the per-build status lines. [AI]"""
+    builds = [_build(1, warnings=40, test_pass=3), _build(2, test_pass=3)]
+
+    async with _serving(_dashboard_handler(("Nightly", builds))):
+        out = await server.get_dashboard("P")
+
+    assert "all passing" not in out
+    assert "## Nightly (2 builds)\n" in out
+    assert "- [id=1] build-1 @ site: warnings=40, test_pass=3\n" in out
+    assert "- [id=2] build-2 @ site: test_pass=3\n" in out
+
+
+@pytest.mark.asyncio
+async def test_dashboard_mixed_group():
+    """Builds with issues come first, worst first, then clean builds up to 20. [AI]"""
+    builds = [_build(i, test_pass=1) for i in range(1, 26)]
+    builds[4] = _build(5, test_fail=1)
+    builds[9] = _build(10, compile_err=4)
+
+    async with _serving(_dashboard_handler(("Nightly", builds))):
+        out = await server.get_dashboard("P")
+
+    clean_ids = [str(i) for i in range(1, 26) if i not in (5, 10)]
+    assert _BUILD_ID_RE.findall(out) == ["10", "5", *clean_ids[:18]]
+    assert "- !!![id=10] build-10 @ site: compile_err=4\n" in out
+    assert "- !!![id=5] build-5 @ site: test_fail=1\n" in out
+    assert "  ... and 5 more builds\n" in out
+
+
+@pytest.mark.asyncio
+async def test_dashboard_skips_empty_groups():
+    """Groups without builds are left out. [AI]"""
+    handler = _dashboard_handler(("Experimental", []), ("Nightly", [_build(1)]))
+
+    async with _serving(handler):
+        out = await server.get_dashboard("P")
+
+    assert "Experimental" not in out
+    assert "## Nightly (1 builds) — all passing\n" in out